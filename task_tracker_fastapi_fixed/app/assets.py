@@ -0,0 +1,171 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`python -m app.assets` copies every file under `static/` to `static/dist/` with a content
+hash in its name, writes `.gz` (and `.br` when the `brotli` package is installed) variants
+next to it and records the mapping in `static/dist/manifest.json`. Templates reference
+assets through `static_url()`, which falls back to the plain file when no build exists or
+when the source has changed since the build (so editing `styles.css` in development shows up
+without rerunning the build).
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import stat
+from mimetypes import guess_type
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from .compression import accepts_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = "static"
+BUILD_SUBDIR = "dist"
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_manifest: dict[str, str] = {}
+# Source mtimes at which the manifest entries were last confirmed to match their sources.
+_checked_mtimes: dict[str, int] = {}
+
+def _build_dir() -> str:
+    return os.path.join(STATIC_DIR, BUILD_SUBDIR)
+
+def _write_compressed(path: str, data: bytes) -> None:
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as fh:
+                fh.write(compressed)
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def _source_path(rel_path: str) -> str:
+    return os.path.join(STATIC_DIR, *rel_path.split("/"))
+
+def _fingerprinted_path(rel_path: str, digest: str) -> str:
+    stem, ext = os.path.splitext(rel_path)
+    return f"{BUILD_SUBDIR}/{stem}.{digest}{ext}"
+
+def _is_current(rel_path: str, fingerprinted: str) -> bool:
+    """True if `fingerprinted` was built from the current source."""
+    try:
+        with open(_source_path(rel_path), "rb") as fh:
+            data = fh.read()
+    except FileNotFoundError:
+        return False
+    return fingerprinted == _fingerprinted_path(rel_path, _digest(data))
+
+def _entry_is_current(rel_path: str, fingerprinted: str) -> bool:
+    """Cheap mtime check first; re-hash the source only when it was touched since the last check."""
+    try:
+        mtime = os.stat(_source_path(rel_path)).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    if _checked_mtimes.get(rel_path) == mtime:
+        return True
+    if not _is_current(rel_path, fingerprinted):
+        return False
+    _checked_mtimes[rel_path] = mtime
+    return True
+
+def build_assets() -> dict[str, str]:
+    """Rebuild `static/dist/` and its manifest. Returns the manifest."""
+    build_dir = _build_dir()
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if os.path.abspath(root) == os.path.abspath(STATIC_DIR) and BUILD_SUBDIR in dirs:
+            dirs.remove(BUILD_SUBDIR)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            rel_path = os.path.relpath(source, STATIC_DIR).replace(os.sep, "/")
+            with open(source, "rb") as fh:
+                data = fh.read()
+            fingerprinted = _fingerprinted_path(rel_path, _digest(data))
+            target = os.path.join(STATIC_DIR, *fingerprinted.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as fh:
+                fh.write(data)
+            if os.path.splitext(rel_path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                _write_compressed(target, data)
+            manifest[rel_path] = fingerprinted
+    with open(os.path.join(build_dir, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    load_manifest()
+    return manifest
+
+def load_manifest() -> dict[str, str]:
+    """Load the manifest, keeping only entries whose sources have not changed since the build."""
+    global _manifest
+    _checked_mtimes.clear()
+    try:
+        with open(os.path.join(_build_dir(), MANIFEST_NAME), encoding="utf-8") as fh:
+            _manifest = json.load(fh)
+    except FileNotFoundError:
+        _manifest = {}
+    for rel_path, fingerprinted in list(_manifest.items()):
+        if not _entry_is_current(rel_path, fingerprinted):
+            del _manifest[rel_path]
+    return _manifest
+
+def static_url(path: str) -> str:
+    """Jinja helper: `{{ static_url('styles.css') }}` -> `/static/dist/styles.<hash>.css`."""
+    path = path.lstrip("/")
+    fingerprinted = _manifest.get(path)
+    if fingerprinted is None or not _entry_is_current(path, fingerprinted):
+        _manifest.pop(path, None)
+        return f"/static/{path}"
+    return f"/static/{fingerprinted}"
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a `.br`/`.gz` sibling when the client accepts it and marks
+    the fingerprinted files listed in the manifest as immutable.
+    """
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if not accepts_encoding(accept_encoding, encoding):
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    if response.status_code == 200:
+                        response.headers["content-encoding"] = encoding
+                        response.headers["content-type"] = self._media_type(path)
+                    break
+        if response is None:
+            response = await super().get_response(path, scope)
+        if path.replace(os.sep, "/") in _manifest.values() and response.status_code in (200, 304):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+    @staticmethod
+    def _media_type(path: str) -> str:
+        media_type = guess_type(path)[0] or "text/plain"
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        return media_type
+
+load_manifest()
+
+if __name__ == "__main__":
+    for source, target in build_assets().items():
+        print(f"{source} -> {target}")
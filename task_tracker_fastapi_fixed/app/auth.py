@@ -5,10 +5,10 @@ from sqlalchemy.orm import Session
 from passlib.hash import bcrypt
 from .db import get_db
 from .models import User
-from fastapi.templating import Jinja2Templates
+from .profiling import ProfiledRoute
+from .templating import templates
 
-router = APIRouter(tags=["auth"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(tags=["auth"], route_class=ProfiledRoute)
 
 @router.get("/login", response_class=HTMLResponse)
 def login_form(request: Request):
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import os
+from contextlib import contextmanager
+from passlib.hash import bcrypt
+from .db import Base, engine, get_db
+from .models import User, Role, UserRole, Project, ProjectMember
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BOOTSTRAP_LOCK_PATH = "./app.db.bootstrap.lock"
+BOOTSTRAP_READY_PATH = "./app.db.ready"
+# Set by `python -m app.serve` so that all workers of one run share the same id.
+BOOT_ID_ENV = "TASK_TRACKER_BOOT_ID"
+
+@contextmanager
+def _file_lock(path: str):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+
+def _read_ready_marker() -> str | None:
+    try:
+        with open(BOOTSTRAP_READY_PATH, encoding="utf-8") as fh:
+            return fh.read().strip()
+    except FileNotFoundError:
+        return None
+
+def _write_ready_marker(boot_id: str) -> None:
+    tmp_path = f"{BOOTSTRAP_READY_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        fh.write(boot_id)
+    os.replace(tmp_path, BOOTSTRAP_READY_PATH)
+
+def seed_database():
+    Base.metadata.create_all(bind=engine)
+    with next(get_db()) as db:
+        def ensure_role(role_name: str) -> Role:
+            role = db.query(Role).filter(Role.role_name == role_name).first()
+            if not role:
+                role = Role(role_name=role_name)
+                db.add(role)
+                db.commit()
+            return role
+
+        def ensure_user(email: str, username: str, pwd: str, role_name: str):
+            user = db.query(User).filter(User.email == email).first()
+            if not user:
+                user = User(email=email, username=username, password_hash=bcrypt.hash(pwd))
+                db.add(user)
+                db.commit()
+                db.refresh(user)
+            role = ensure_role(role_name)
+            existing = (
+                db.query(UserRole)
+                .filter(UserRole.user_id == user.user_id, UserRole.role_id == role.role_id)
+                .first()
+            )
+            if not existing:
+                db.add(UserRole(user_id=user.user_id, role_id=role.role_id))
+                db.commit()
+
+        def ensure_owner_memberships():
+            projects = db.query(Project).all()
+            created = False
+            for project in projects:
+                exists = (
+                    db.query(ProjectMember)
+                    .filter(
+                        ProjectMember.project_id == project.project_id,
+                        ProjectMember.user_id == project.created_by,
+                    )
+                    .first()
+                )
+                if not exists:
+                    db.add(ProjectMember(project_id=project.project_id, user_id=project.created_by))
+                    created = True
+            if created:
+                db.commit()
+
+        ensure_role("USER")
+        ensure_role("MANAGER")
+        ensure_role("ADMIN")
+        ensure_user("admin@example.com", "admin", "admin123", "ADMIN")
+        ensure_user("manager@example.com", "manager", "manager123", "MANAGER")
+        ensure_user("user@example.com", "user", "user123", "USER")
+        ensure_owner_memberships()
+
+def run_bootstrap() -> bool:
+    """
+    Run `seed_database` at most once per boot id, serialized across processes by a file lock.
+    Workers that lose the race block on the lock and then find the ready marker, so they skip
+    the seeding. Without a boot id (plain `uvicorn app.main:app`) seeding always runs, just
+    never concurrently. Returns True if this process performed the bootstrap.
+    """
+    boot_id = os.environ.get(BOOT_ID_ENV)
+    with _file_lock(BOOTSTRAP_LOCK_PATH):
+        if boot_id and _read_ready_marker() == boot_id:
+            return False
+        seed_database()
+        if boot_id:
+            _write_ready_marker(boot_id)
+    return True
@@ -0,0 +1,77 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+
+# Only these responses are worth compressing on the fly. Static files are excluded by path
+# (see `HTMLJSONGZipMiddleware.exclude_paths`), they have precompressed variants instead.
+COMPRESSIBLE_MEDIA_TYPES = {"text/html", "application/json"}
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Parse an `Accept-Encoding` header into `{coding: q-value}`."""
+    qualities = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+def accepts_encoding(header: str, encoding: str) -> bool:
+    """True if `encoding` is acceptable, either listed explicitly or through `*`, with q > 0."""
+    qualities = parse_accept_encoding(header)
+    return qualities.get(encoding, qualities.get("*", 0.0)) > 0
+
+class _HTMLJSONGZipResponder(GZipResponder):
+    """
+    Passes through non-HTML/JSON and already encoded responses. Streamed bodies are buffered
+    up to `minimum_size` first, so small responses sent in several chunks stay uncompressed.
+    """
+
+    passthrough = False
+    pending = b""
+
+    async def send_with_gzip(self, message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            self.passthrough = media_type not in COMPRESSIBLE_MEDIA_TYPES or "content-encoding" in headers
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.body" and not self.started:
+            body = self.pending + message.get("body", b"")
+            if message.get("more_body", False) and len(body) < self.minimum_size:
+                self.pending = body
+                return
+            self.pending = b""
+            message = {**message, "body": body}
+        await super().send_with_gzip(message)
+
+class HTMLJSONGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware limited to HTML and JSON responses that are not already encoded."""
+
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 9, exclude_paths: tuple[str, ...] = ()) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_paths = exclude_paths
+
+    def _is_excluded(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.exclude_paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] == "http"
+            and not self._is_excluded(scope["path"])
+            and accepts_encoding(Headers(scope=scope).get("accept-encoding", ""), "gzip")
+        ):
+            responder = _HTMLJSONGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,276 @@
+"""
+On-demand request profiling for admins.
+
+A request is profiled when an admin adds `?profile=1` or the `X-Profile: 1` header.
+A background thread samples the Python stack of the threadpool thread while it runs the
+request's endpoint (routes use `ProfiledRoute`), which covers the endpoint's queries, ORM
+loading and template rendering. Dependencies such as `current_user` run as separate
+threadpool calls and are not sampled, but SQLAlchemy engine events record every SQL
+statement of the request with its duration. The result is stored as JSON in a bounded
+on-disk ring (`PROFILE_DIR`, newest `PROFILE_RING_SIZE` kept).
+"""
+from __future__ import annotations
+import dataclasses
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from .db import SessionLocal, engine
+from .deps import current_user, role_required
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", ".profiles")
+PROFILE_RING_SIZE = int(os.environ.get("PROFILE_RING_SIZE", "50"))
+SAMPLE_INTERVAL = 0.005
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_HEADER = "x-profile"
+
+# Threads whose innermost frame is in one of these files are idle (waiting for work).
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "asyncio/runners.py")
+# Stack categories shown on the detail page. A sample belongs to the category of its
+# innermost matching frame, so a lazy load triggered from a template counts as ORM/SQL.
+_CATEGORIES = (
+    ("Jinja", ("jinja2",)),
+    ("ORM", ("sqlalchemy/orm",)),
+    ("SQL", ("sqlalchemy/engine", "sqlite3")),
+)
+
+class RequestProfile:
+    """Per-request state, reachable from the threadpool through the `_current_profile` context variable."""
+
+    def __init__(self):
+        self.sql: list[dict] = []
+        self.thread_ids: set[int] = set()
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+def _sampled_in_thread(call):
+    """Wrap a sync endpoint so that its thread is sampled exactly while it runs for a profiled request."""
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        thread_id = threading.get_ident()
+        profile.thread_ids.add(thread_id)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profile.thread_ids.discard(thread_id)
+
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoint registers its threadpool thread with the request profile."""
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        if call is None or inspect.iscoroutinefunction(call):
+            return super().get_route_handler()
+        original = self.dependant
+        self.dependant = dataclasses.replace(original, call=_sampled_in_thread(call))
+        try:
+            return super().get_route_handler()
+        finally:
+            self.dependant = original
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        context._profile_query_start = time.perf_counter()
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profile_query_start", None)
+    if profile is None or started is None:
+        return
+    profile.sql.append({"statement": statement, "duration_ms": (time.perf_counter() - started) * 1000})
+
+class StackSampler:
+    """
+    Periodically records the call stacks of the threads working on `profile` as folded
+    stacks (`frame;frame;frame` -> count), the format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, profile: RequestProfile, interval: float = SAMPLE_INTERVAL):
+        self.profile = profile
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            thread_ids = set(self.profile.thread_ids)
+            if not thread_ids:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in thread_ids:
+                    continue
+                if frame.f_code.co_filename.replace("\\", "/").endswith(_IDLE_FILES):
+                    continue
+                self.stacks[_fold(frame)] += 1
+
+def _fold(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+def _categorize(stacks: Counter) -> dict[str, int]:
+    totals = {name: 0 for name, _ in _CATEGORIES}
+    totals["Ostatní"] = 0
+    for stack, count in stacks.items():
+        totals[_category_of(stack)] += count
+    return totals
+
+def _category_of(stack: str) -> str:
+    for frame in reversed(stack.replace("\\", "/").split(";")):
+        for name, needles in _CATEGORIES:
+            if any(needle in frame for needle in needles):
+                return name
+    return "Ostatní"
+
+def _top_functions(stacks: Counter, limit: int = 25) -> list[dict]:
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for name in set(frames):
+            total[name] += count
+    return [
+        {"function": name, "total": count, "own": own.get(name, 0)}
+        for name, count in total.most_common(limit)
+    ]
+
+def _is_admin_request(request: Request) -> bool:
+    if not request.session.get("user_id"):
+        return False
+    db = SessionLocal()
+    try:
+        role_required("ADMIN")(current_user(request, db))
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+    return True
+
+def _wants_profile(request: Request) -> bool:
+    return request.query_params.get(PROFILE_QUERY_PARAM) == "1" or request.headers.get(PROFILE_HEADER) == "1"
+
+def _profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.json")
+
+def save_profile(record: dict) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    tmp_path = _profile_path(record["id"]) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(record, fh)
+    os.replace(tmp_path, _profile_path(record["id"]))
+    for old in list_profile_ids()[PROFILE_RING_SIZE:]:
+        try:
+            os.remove(_profile_path(old))
+        except FileNotFoundError:
+            pass
+
+def list_profile_ids() -> list[str]:
+    """Profile ids, newest first (ids start with a sortable timestamp)."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    ids = [name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith(".json")]
+    return sorted(ids, reverse=True)
+
+def load_profile(profile_id: str) -> Optional[dict]:
+    if profile_id not in list_profile_ids():
+        return None
+    try:
+        with open(_profile_path(profile_id), encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+def folded_stacks(record: dict) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in record["stacks"].items())
+
+class ProfilingMiddleware:
+    """
+    Plain ASGI middleware; requests without the opt-in pass straight through.
+    Must be added before `SessionMiddleware` so that the session is available here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if not _wants_profile(request) or not await run_in_threadpool(_is_admin_request, request):
+            await self.app(scope, receive, send)
+            return
+
+        now = datetime.now()
+        profile_id = f"{now:%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        sampler = StackSampler(profile)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            _current_profile.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            record = {
+                "id": profile_id,
+                "created_at": now.isoformat(timespec="seconds"),
+                "method": request.method,
+                "path": request.url.path,
+                "query": str(request.url.query),
+                "status_code": status_code,
+                "duration_ms": duration_ms,
+                "sample_interval_ms": sampler.interval * 1000,
+                "sample_count": sum(sampler.stacks.values()),
+                "categories": _categorize(sampler.stacks),
+                "top_functions": _top_functions(sampler.stacks),
+                "stacks": dict(sampler.stacks),
+                "sql": profile.sql,
+                "sql_total_ms": sum(q["duration_ms"] for q in profile.sql),
+            }
+            await run_in_threadpool(save_profile, record)
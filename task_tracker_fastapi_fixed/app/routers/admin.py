@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Request, Depends, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from passlib.hash import bcrypt
 from ..db import get_db
 from ..models import User, Project, Task, Comment, Role, UserRole
 from ..deps import role_required, current_user, highest_role
-from fastapi.templating import Jinja2Templates
+from ..profiling import ProfiledRoute, list_profile_ids, load_profile, folded_stacks
+from ..templating import templates
 
-router = APIRouter(tags=["admin"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(tags=["admin"], route_class=ProfiledRoute)
 
 def _ensure_role(db: Session, role_name: str) -> Role:
     role = db.query(Role).filter(Role.role_name == role_name).first()
@@ -78,3 +78,25 @@ def delete_user(user_id: int, db: Session = Depends(get_db), acting_admin: User
     db.delete(user)
     db.commit()
     return RedirectResponse(url="/admin/users", status_code=303)
+
+@router.get("/profiles", response_class=HTMLResponse, dependencies=[Depends(role_required("ADMIN"))])
+def list_profiles(request: Request):
+    profiles = [p for p in (load_profile(pid) for pid in list_profile_ids()) if p]
+    return templates.TemplateResponse("admin/profiles.html", {"request": request, "profiles": profiles})
+
+@router.get("/profiles/{profile_id}", response_class=HTMLResponse, dependencies=[Depends(role_required("ADMIN"))])
+def profile_detail(profile_id: str, request: Request):
+    profile = load_profile(profile_id)
+    if not profile:
+        return RedirectResponse(url="/admin/profiles", status_code=303)
+    return templates.TemplateResponse("admin/profile_detail.html", {"request": request, "profile": profile})
+
+@router.get("/profiles/{profile_id}/folded", dependencies=[Depends(role_required("ADMIN"))])
+def profile_folded(profile_id: str):
+    profile = load_profile(profile_id)
+    if not profile:
+        return RedirectResponse(url="/admin/profiles", status_code=303)
+    return PlainTextResponse(
+        folded_stacks(profile),
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'},
+    )
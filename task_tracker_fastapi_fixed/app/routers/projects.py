@@ -6,10 +6,10 @@ from sqlalchemy import or_
 from ..db import get_db
 from ..models import Project, Task, User, ProjectMember
 from ..deps import current_user, role_required, highest_role
-from fastapi.templating import Jinja2Templates
+from ..profiling import ProfiledRoute
+from ..templating import templates
 
-router = APIRouter(tags=["projects"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(tags=["projects"], route_class=ProfiledRoute)
 
 def _is_admin(user: User) -> bool:
     return highest_role(user) == "ADMIN"
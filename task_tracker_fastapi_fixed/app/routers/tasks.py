@@ -5,10 +5,10 @@ from typing import Optional
 from ..db import get_db
 from ..models import Task, Comment, User, ProjectMember
 from ..deps import current_user, ROLE_HIERARCHY, role_required, highest_role
-from fastapi.templating import Jinja2Templates
+from ..profiling import ProfiledRoute
+from ..templating import templates
 
-router = APIRouter(tags=["tasks"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(tags=["tasks"], route_class=ProfiledRoute)
 
 def _is_admin(user: User) -> bool:
     return highest_role(user) == "ADMIN"
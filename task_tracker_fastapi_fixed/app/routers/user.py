@@ -5,10 +5,10 @@ from passlib.hash import bcrypt
 from ..db import get_db
 from ..deps import current_user
 from ..models import User
-from fastapi.templating import Jinja2Templates
+from ..profiling import ProfiledRoute
+from ..templating import templates
 
-router = APIRouter(tags=["user"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(tags=["user"], route_class=ProfiledRoute)
 
 @router.get("/profile", response_class=HTMLResponse)
 def profile_form(request: Request, user: User = Depends(current_user)):
@@ -0,0 +1,32 @@
+"""
+Multi-worker launcher: `python -m app.serve --workers 4`.
+
+The parent process builds the static assets, seeds the database and compiles all templates before the workers
+start, so the workers only find the ready marker and load templates from the bytecode cache.
+"""
+import argparse
+import os
+import uuid
+import uvicorn
+from .assets import build_assets
+from .bootstrap import BOOT_ID_ENV, run_bootstrap
+from .templating import precompile_templates
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the task tracker with several workers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.environ[BOOT_ID_ENV] = uuid.uuid4().hex
+    build_assets()
+    # Importing the app here warms module imports (and their .pyc files) before the workers start.
+    from . import main as _app_module  # noqa: F401
+    run_bootstrap()
+    precompile_templates()
+
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
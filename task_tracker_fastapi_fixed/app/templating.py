@@ -0,0 +1,25 @@
+import os
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+from .assets import static_url
+
+TEMPLATES_DIR = "templates"
+# Compiled templates are shared between worker processes through this directory,
+# so only the first process pays for parsing the Jinja sources.
+TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR", ".jinja_cache")
+
+os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+
+templates = Jinja2Templates(directory=TEMPLATES_DIR)
+templates.env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+templates.env.globals["static_url"] = static_url
+
+def precompile_templates() -> int:
+    """
+    Load every template once so it is compiled (and written to the bytecode cache).
+    Returns the number of templates that were loaded.
+    """
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)